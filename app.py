@@ -11,8 +11,7 @@
 # - https://github.com/mattlisiv/newsapi-python
 # - https://newsapi.org/docs
 #
-# The app uses the configparser module to read in a standard config file of
-# key=value format: https://docs.python.org/3/library/configparser.html
+# The config file is parsed by the config module.
 #
 # Author: Kevin Browne
 # Contact: brownek@mcmaster.ca
@@ -20,8 +19,10 @@
 ################################################################################
 
 from newsapi.newsapi_client import NewsApiClient
-import configparser
+import atexit
+import threading
 import redis
+from config import read_config
 from logger import *
 
 # App singleton contains all of the read-only state data that must be
@@ -31,44 +32,94 @@ class App():
 
     __instance = None
 
-    # Setup the singleton based on the config file
+    # Setup the singleton based on the config file.  Only the config file is
+    # read here; the News API client, database connection and loggers are
+    # created on first use.  So the News API client is only created when a
+    # report is printed, and importing the app modules opens no files or
+    # connections.  Note that the first logged message creates the loggers,
+    # so with database logging enabled even choosing "Exit" straight away
+    # connects to the database, when the queued log messages are sent.
     def setup(self):
 
-        # Load the config file using the Config Parser module
-        config = configparser.ConfigParser()
-        config.read("config.cfg")
+        # Load the config file into a dict of sections of key=value pairs
+        self.__config = read_config("config.cfg")
+        if (self.__config["Logging"]["file"] == "TRUE"):
+            self.log_filename = self.__config["Logging"]["log_filename"]
 
-        # setup the News API module
-        self.newsapi = NewsApiClient(api_key=config["NewsAPI"]["apikey"])
+        self.__newsapi = None
+        self.__newsapi_lock = threading.Lock()
+        self.__dbconn = None
+        self.__logger = None
+        self.__logger_created = False
+        self.log_file = None
 
-        # setup database connection based on the config file values
-        self.dbconn = redis.Redis(
-            host=config["Database"]["host"],
-            port=config["Database"]["port"],
-            password=config["Database"]["password"],
-            decode_responses=True)
+    # The News API module, created on first access.  The first access usually
+    # happens in the report worker threads, so creation is done under a lock
+    # to make sure only one client is ever created.
+    @property
+    def newsapi(self):
+        if (self.__newsapi == None):
+            with self.__newsapi_lock:
+                if (self.__newsapi == None):
+                    self.__newsapi = \
+                      NewsApiClient(api_key=self.__config["NewsAPI"]["apikey"])
+        return self.__newsapi
 
-        # Setup logging chain-of-reponsibility chain
-        self.__logger = None
-        if (config["Logging"]["console"] == "TRUE"):
+    # The database connection, created on first access based on the config
+    # file values, sharing an explicit connection pool so bursts of commands
+    # (e.g. database logging) reuse open connections.  redis-py uses the
+    # C-based hiredis response parser automatically when the hiredis package
+    # is installed.
+    @property
+    def dbconn(self):
+        if (self.__dbconn == None):
+            config = self.__config["Database"]
+            pool = redis.ConnectionPool(
+                host=config["host"],
+                port=config["port"],
+                password=config["password"],
+                decode_responses=True,
+                max_connections=16)
+            self.__dbconn = redis.Redis(connection_pool=pool)
+        return self.__dbconn
+
+    # Setup logging chain-of-reponsibility chain, on the first logged message.
+    # A DatabaseLogger needs the database connection, so this creates it too.
+    def __create_logger(self):
+        config = self.__config["Logging"]
+        if (config["console"] == "TRUE"):
             self.__logger = ConsoleLogger( self.__logger )
-        if (config["Logging"]["file"] == "TRUE"):
-            self.log_filename = config["Logging"]["log_filename"]
-            self.__logger = FileLogger( self.__logger, self.log_filename )
-        if (config["Logging"]["database"] == "TRUE"):
+        if (config["file"] == "TRUE"):
+            # the log file is written through a 64 KiB buffer, so make sure
+            # it is flushed when the application exits
+            self.log_file = open(self.log_filename, "a", buffering=65536)
+            atexit.register(self.log_file.flush)
+            self.__logger = FileLogger( self.__logger, self.log_file )
+        if (config["database"] == "TRUE"):
             self.__logger = DatabaseLogger( self.__logger, self.dbconn )
+        self.__logger_created = True
 
     # Log a message
     def log(self,message):
+        if not self.__logger_created:
+            self.__create_logger()
         if self.__logger == None:
             return
         else:
-            self.__logger.log(message)
+            self.__logger.log(message, timestamp())
+
+    # Flush any messages buffered by the loggers
+    def flush(self):
+        if self.__logger != None:
+            self.__logger.flush()
 
-    # Creates or returns the singleton instance
+    # Creates or returns the singleton instance, returning the existing instance
+    # immediately once it has been created
     def __new__(cls):
-        if (cls.__instance is None):
-            cls.__instance = super(App, cls).__new__(cls)
-            cls.__instance.setup()
+        instance = cls.__instance
+        if (instance is not None):
+            return instance
 
-        return cls.__instance
+        instance = cls.__instance = super(App, cls).__new__(cls)
+        instance.setup()
+        return instance
@@ -0,0 +1,25 @@
+################################################################################
+# Config file parsing
+#
+# Purpose: Reads the application's config file, a standard file of [Section]
+# headers followed by key=value lines.  The file is small and simple, so rather
+# than pay for the configparser module we parse it with a couple of regular
+# expressions.  This module has no dependencies beyond the standard library.
+#
+################################################################################
+
+import re
+
+# Parse a config file into a dict mapping section name -> {key: value}.
+# re.split with a capture group gives [preamble, name1, body1, name2, ...].
+# The patterns match [ \t] rather than \s so that a match never runs onto
+# the next line, e.g. an empty "password=" value stays empty.
+def read_config(filename):
+    with open(filename) as config_file:
+        text = config_file.read()
+    config = {}
+    sections = re.split(r"^[ \t]*\[(\w+)\][ \t]*$", text, flags=re.M)
+    for name, body in zip(sections[1::2], sections[2::2]):
+        pairs = re.findall(r"^[ \t]*(\w+)[ \t]*=[ \t]*(.*)$", body, re.M)
+        config[name] = {key.lower(): value.strip() for key, value in pairs}
+    return config
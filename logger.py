@@ -12,47 +12,83 @@
 ################################################################################
 
 from abc import ABC, abstractmethod
+import atexit
 import datetime
 
-# Define what it means to be a logger object in chain-of-responsiblity pattern
+# Returns the current time formatted for a log entry.  This is computed once per
+# message at the head of the chain and passed along to every logger.
+def timestamp():
+    return datetime.datetime.now().isoformat(sep=" ", timespec="microseconds")
+
+# Define what it means to be a logger object in chain-of-responsiblity pattern.
+# Each logger writes the message itself, and the message is only passed along
+# the chain when there is a next logger to hand it to.
 class Logger(ABC):
 
-    def log(self, message):
-        if (self.__next_logger == None):
-            return
-        else:
-            self.__next_logger.log(message)
+    def log(self, message, ts):
+        self.write(message, ts)
+        if (self.__next_logger != None):
+            self.__next_logger.log(message, ts)
+
+    # Write the message using this logger
+    @abstractmethod
+    def write(self, message, ts):
+        pass
+
+    # Flush any buffered messages, passing the request along the chain
+    def flush(self):
+        if (self.__next_logger != None):
+            self.__next_logger.flush()
 
     def __init__(self,next_logger):
         self.__next_logger = next_logger
 
-# Logs directly to a file, appends message on next line
+# Logs directly to a file, appends message on next line.  The file is opened
+# and owned by the caller, which may buffer writes to it; flush() flushes it.
 class FileLogger(Logger):
 
-    def __init__(self,next_logger,log_filename):
-        self.__log_file = open(log_filename, "a+")
+    def __init__(self,next_logger,log_file):
+        self.__log_file = log_file
         super().__init__(next_logger)
 
-    def log(self, message):
-        self.__log_file.write(str(datetime.datetime.now()) + ": " + message \
-                              + "\n")
-        super().log(message)
+    def write(self, message, ts):
+        self.__log_file.write(f"{ts}: {message}\n")
+
+    def flush(self):
+        self.__log_file.flush()
+        super().flush()
 
 # Logs message directly to the console
 class ConsoleLogger(Logger):
 
-    def log(self, message):
-        print(str(datetime.datetime.now()) + ": " + message)
-        super().log(message)
+    def write(self, message, ts):
+        print(f"{ts}: {message}")
 
 # Logs message to the redis database, uses timestamp as field in a hash with key
-# "log", and message is the value
+# "log", and message is the value.  Messages are queued in a pipeline and sent
+# to the database in batches of up to 16, or when flush() is called / at exit.
 class DatabaseLogger(Logger):
 
+    batch_size = 16
+
     def __init__(self,next_logger,dbconn):
-        self.__dbconn = dbconn
+        self.__pipe = dbconn.pipeline(transaction=False)
+        self.__pending = 0
+        atexit.register(self.flush)
         super().__init__(next_logger)
 
-    def log(self, message):
-        self.__dbconn.hset("log", str(datetime.datetime.now()), message)
-        super().log(message)
\ No newline at end of file
+    def write(self, message, ts):
+        self.__pipe.hset("log", ts, message)
+        self.__pending = self.__pending + 1
+        if (self.__pending >= self.batch_size):
+            self.__send()
+
+    def flush(self):
+        self.__send()
+        super().flush()
+
+    # Send any queued messages to the database in one round-trip
+    def __send(self):
+        if (self.__pending > 0):
+            self.__pipe.execute()
+            self.__pending = 0
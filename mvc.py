@@ -17,7 +17,14 @@
 
 from app import *
 from report import *
-from time import time
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+import json
+from pathlib import Path
+import redis
+
+# Module-level reference to the App singleton, used by the controller and model
+APP = App()
 
 # View is responsible for user interface... i.e. presenting options to the user
 # and collecting user input.  Each method represents a different option page.
@@ -27,29 +34,29 @@ class View():
 
     @staticmethod
     def main_page():
-        print("****************************************")
-        print("(1) Create a new report")
-        print("(2) Print a report")
-        print("(3) Exit")
+        print("****************************************\n"
+              "(1) Create a new report\n"
+              "(2) Print a report\n"
+              "(3) Exit")
         option = input("Enter number to select an option: ")
         return int(option)
 
     @staticmethod
     def create_report():
-        print("****************************************")
-        print("Enter the data below to create a report!")
+        print("****************************************\n"
+              "Enter the data below to create a report!")
         report_name = input("Name: ")
-        print("Some potential source IDs: cbc-news, abc-news, cnn, espn, " + \
+        print("Some potential source IDs: cbc-news, abc-news, cnn, espn, "
               "cbs-news, buzzfeed, nbc-news, usa-today")
         source_id = input("Source ID: ")
         return report_name, source_id
 
     @staticmethod
     def add_to_report():
-        print("Do you wish to add more data to the report?")
-        print("(1) Add a search term for article title only")
-        print("(2) Add a search term for article title and body")
-        print("(3) Finish report creation")
+        print("Do you wish to add more data to the report?\n"
+              "(1) Add a search term for article title only\n"
+              "(2) Add a search term for article title and body\n"
+              "(3) Finish report creation")
         option = input("Enter number to select an option: ")
         return int(option)
 
@@ -58,12 +65,14 @@ class View():
         search_term = input("Enter search term: ")
         return search_term
 
+    # Reports with no name (None) do not exist yet and are not listed, but the
+    # numbering is kept so each number still matches the report id
     @staticmethod
     def print_report(report_names):
-        i = 1
-        for report in report_names:
-            print("(" + str(i) + ") " + report)
-            i = i + 1
+        if (len(report_names) != 0):
+            print("\n".join(f"({i}) {report}"
+                            for i, report in enumerate(report_names, 1)
+                            if report != None))
         report_id = int(input("Enter number of the report to generate: "))
         output_filename = input("Enter filename for report output: ")
         return report_id, output_filename
@@ -85,13 +94,14 @@ class Controller():
 
         while True:
             option = self.__view.main_page()
-            App().log("Selected main page option " + str(option))
+            APP.log(f"Selected main page option {option}")
             if (option == 1):
                 self.__create_report()
             elif (option == 2):
                 self.__print_report()
             else:
                 print("Goodbye!")
+                APP.flush()
                 exit()
 
     # create a report, first with the base information required, and then
@@ -100,7 +110,7 @@ class Controller():
 
         # get the base report data... a report name and source id
         report_name, source_id = self.__view.create_report()
-        App().log("Created report: name=" + report_name)
+        APP.log(f"Created report: name={report_name}")
 
         # get any additions to the report in terms of title or all searches
         title_search_terms = []
@@ -112,17 +122,17 @@ class Controller():
             if (option == 1):
                 search_term = self.__view.search_term()
                 title_search_terms.append(search_term)
-                App().log("Created report title search term: " + search_term)
+                APP.log(f"Created report title search term: {search_term}")
             elif (option == 2):
                 search_term = self.__view.search_term()
                 all_search_terms.append(search_term)
-                App().log("Created report all search term: " + search_term)
+                APP.log(f"Created report all search term: {search_term}")
             else:
                 # when done, have the model save our report data to the database
                 self.__model.create_report(report_name, source_id, \
                                            ','.join(title_search_terms), \
                                            ','.join(all_search_terms))
-                App().log("Finished created report")
+                APP.log("Finished created report")
                 break
 
     # Present the user with a list of all possible reports, ask them to select
@@ -134,14 +144,20 @@ class Controller():
         # ask user to select the report to print
         report_names = self.__model.get_report_names()
         report_id, output_filename = self.__view.print_report(report_names)
-        App().log("Printing report: name=" + report_names[(report_id - 1)])
+        APP.log(f"Printing report: name={report_names[report_id - 1]}")
 
         # Measure time to create and print the report.... record start time
-        start_time = time()
+        start_time = perf_counter()
+
+        # the selected report may not exist, e.g. if it is still being created
+        report_data = self.__model.get_report_data(report_id)
+        if (report_data == None):
+            APP.log(f"Report not found: id={report_id}")
+            print("Report not found!")
+            return
 
         # create the report by creating the base report, and then decorating it
-        source_id, title_search_terms, all_search_terms = \
-          self.__model.get_report_data(report_id)
+        source_id, title_search_terms, all_search_terms = report_data
         report = ReportBase(source_id)
         if (len(title_search_terms) != 0):
             title_search_terms_list = title_search_terms.split(",")
@@ -151,18 +167,21 @@ class Controller():
             all_search_terms_list = all_search_terms.split(",")
             for search_term in all_search_terms_list:
                 report = ReportAllSearch(report, source_id, search_term)
-        App().log("Base report and decorators created")
+        APP.log("Base report and decorators created")
+
+        # make all of the News API calls for the report concurrently, then
+        # build the report text from their results
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            report.prefetch(executor)
+            report_text = report.report_text()
 
-        # output the report
-        output_file = open(output_filename, "w")
-        output_file.write(report.report_text())
-        output_file.close()
+        # output the report, the whole text is written in one call
+        Path(output_filename).write_text(report_text)
 
         # Measure time to create and print the report using the end time
-        end_time = time()
-        total_time = round(end_time - start_time, 4)
-        App().log("Report written to file: " + output_filename)
-        App().log("Time to generate report: " + str(total_time) + "s")
+        total_time = perf_counter() - start_time
+        APP.log(f"Report written to file: {output_filename}")
+        APP.log(f"Time to generate report: {total_time:.4f}s")
         print("Report written to file!")
 
 
@@ -173,53 +192,83 @@ class Model():
     # name, source id and any title/all search terms.  We use this schema for
     # storing data in the database:
     #
-    #      key      hash
-    #   report1 ->  report_name -> "CNN sports report"
-    #               source_id -> "cnn"
-    #               title_search_terms = "nba,mlb,nfl,nhl"
-    #               all_search_terms = "basketball,raptors,football"
+    #      key       JSON string
+    #   report:1 ->  {"report_name": "CNN sports report",
+    #                 "source_id": "cnn",
+    #                 "title_search_terms": "nba,mlb,nfl,nhl",
+    #                 "all_search_terms": "basketball,raptors,football"}
     #
-    #  Where we store report data as a hash at keys report1, report2,
-    #  reporti, ...
+    #  Where we store report data as a JSON string at keys report:1, report:2,
+    #  report:i, ...  Storing each report as a single string value means all
+    #  of the report names can be read with a single MGET.
+    #
+    #  Reports created by earlier versions of the app are stored as a hash at
+    #  the same keys, with the same fields.  These are still read, falling back
+    #  to HGET/HMGET for any key that does not hold a JSON string.
     #
     #  Note that we store the search terms as a comma separated list.  Also
     #  note that we keep track of the number of reports at key report:count.
-    #  We use this to determine the next report key to use.
+    #  We use this to determine the next report key to use.  INCR updates the
+    #  count atomically and returns the new value, so creating a report takes
+    #  two round-trips.
     #
     def create_report(self, report_name, source_id, title_search_terms, \
                       all_search_terms):
-        count = App().dbconn.get("report:count")
-        if (count == None):
-            count = 1
-        else:
-            count = int(count) + 1
-        App().dbconn.set("report:count", count)
-        report_key = "report:" + str(count)
-        App().dbconn.hset(report_key, "report_name", report_name)
-        App().dbconn.hset(report_key, "source_id", source_id)
-        App().dbconn.hset(report_key, "title_search_terms", title_search_terms)
-        App().dbconn.hset(report_key, "all_search_terms", all_search_terms)
-        App().log("Report inserted into database: name=" + report_name)
+        count = APP.dbconn.incr("report:count")
+        APP.dbconn.set(f"report:{count}", json.dumps({
+            "report_name": report_name,
+            "source_id": source_id,
+            "title_search_terms": title_search_terms,
+            "all_search_terms": all_search_terms}))
+        APP.log(f"Report inserted into database: name={report_name}")
 
     # Returns the report names in a list, with the 1,2,3,... order in the list
-    # corresponding to the report:1,report:2,report:3,... keys in the database
+    # corresponding to the report:1,report:2,report:3,... keys in the database.
+    # All of the reports are read with one MGET.  MGET gives None for keys that
+    # are hashes (older reports) or do not exist yet (a report between its
+    # INCR and SET), so those names are fetched with HGET in one pipeline,
+    # which gives None for a key that does not exist.  The view does not list
+    # reports whose name is None.
     def get_report_names(self):
-        count = int(App().dbconn.get("report:count"))
-        i = 1
+        count = int(APP.dbconn.get("report:count") or 0)
         report_names = []
-        while i <= count:
-            report_name = App().dbconn.hget("report:" + str(i), "report_name")
-            report_names.append( report_name )
-            i = i + 1
-        App().log("Report names retrieved: " + str(report_names))
+        if (count != 0):
+            keys = [f"report:{i}" for i in range(1, count + 1)]
+            reports = APP.dbconn.mget(keys)
+            report_names = [None if (report == None) else
+                            json.loads(report)["report_name"]
+                            for report in reports]
+            missing = [i for i, report in enumerate(reports) if report == None]
+            if (len(missing) != 0):
+                pipe = APP.dbconn.pipeline(transaction=False)
+                for i in missing:
+                    pipe.hget(keys[i], "report_name")
+                for i, report_name in zip(missing, pipe.execute()):
+                    report_names[i] = report_name
+        APP.log(f"Report names retrieved: {report_names}")
         return report_names
 
     # Returns the source id, title search terms and all search terms for the
-    # report stored at the key "report:report_id" in the database
+    # report stored at the key "report:report_id" in the database, reading
+    # the hash fields instead if the report was stored as a hash.  Returns
+    # None if there is no report stored at the key.
     def get_report_data(self,report_id):
-        report_key = "report:" + str(report_id)
-        source_id = App().dbconn.hget(report_key, "source_id")
-        title_search_terms = App().dbconn.hget(report_key, "title_search_terms")
-        all_search_terms = App().dbconn.hget(report_key, "all_search_terms")
-        App().log("Retrieved report data for report id: " + str(report_id))
+        report_key = f"report:{report_id}"
+        try:
+            report = APP.dbconn.get(report_key)
+        except redis.ResponseError:
+            report = None
+        if (report == None):
+            source_id, title_search_terms, all_search_terms = \
+              APP.dbconn.hmget(report_key, "source_id", "title_search_terms",
+                               "all_search_terms")
+            if (source_id == None):
+                APP.log(f"No report data for report id: {report_id}")
+                return None
+        else:
+            report = json.loads(report)
+            source_id = report["source_id"]
+            title_search_terms = report["title_search_terms"]
+            all_search_terms = report["all_search_terms"]
+        APP.log(f"Retrieved report data for report id: {report_id}")
         return source_id, title_search_terms, all_search_terms
@@ -21,6 +21,47 @@
 ################################################################################
 
 from app import *
+from functools import lru_cache, wraps
+from time import monotonic
+
+# Bind the App singleton once at import rather than calling App() on every use
+APP = App()
+
+# News API responses are cached by their arguments, so generating the same
+# report again (or reports sharing a source or search term) reuses earlier
+# results rather than repeating the HTTP requests.  News goes stale, so the
+# current cache period (a window of CACHE_SECONDS) is part of every cache key:
+# once the period ends, the next report fetches fresh results.
+CACHE_SECONDS = 300
+
+def cache_period():
+    return int(monotonic() // CACHE_SECONDS)
+
+@lru_cache(maxsize=128)
+def cached_top_headlines(source_id, period):
+    return APP.newsapi.get_top_headlines(sources=source_id)
+
+@lru_cache(maxsize=512)
+def cached_search_everything(source_id, qintitle, q, period):
+    return APP.newsapi.get_everything(sources=source_id, qintitle=qintitle, q=q)
+
+def top_headlines(source_id):
+    return cached_top_headlines(source_id, cache_period())
+
+def search_everything(source_id, qintitle=None, q=None):
+    return cached_search_everything(source_id, qintitle, q, cache_period())
+
+# Memoizes a report_text method so that each report object calls the News API
+# at most once, even if the decorator chain is traversed more than once.
+def memoize_text(report_text):
+
+    @wraps(report_text)
+    def memoized(self):
+        if (self._text is None):
+            self._text = report_text(self)
+        return self._text
+
+    return memoized
 
 # Defines what it means to be a report... must have a report_text method.  This
 # is the "Component" in the Decorator pattern.
@@ -30,24 +71,49 @@ class Report(ABC):
     def report_text(self):
         pass
 
+    # Calls the News API for the data this report needs
+    @abstractmethod
+    def fetch(self):
+        pass
+
+    # Starts this report's News API call on the executor, so that the calls
+    # for every report in a decorator chain can run concurrently
+    def prefetch(self, executor):
+        self._future = executor.submit(self.fetch)
+
+    # Returns this report's News API data, waiting for the prefetched call if
+    # there is one and otherwise calling the News API directly
+    def headlines(self):
+        if (self._future is None):
+            return self.fetch()
+        return self._future.result()
+
 # The base report will be a string of the top headlines for the given source.
 # This corresponds to the ConcreteComponent of the Decorator pattern, it can
 # optionally be decorated to extend the report contents.
 class ReportBase(Report):
 
-    # Calls News API to get top headlines, puts headline data into a string
+    # Puts the News API top headlines data into a string.
+    # The pieces are collected in a list and joined once at the end, which
+    # avoids re-copying the growing string for every article.
+    @memoize_text
     def report_text(self):
-        App().log("Building report base, source id= " + self.__source_id)
-        headlines = App().newsapi.get_top_headlines(sources=self.__source_id)
-        report_text = "Headlines from " + self.__source_id + "\n\n"
+        APP.log(f"Building report base, source id= {self.__source_id}")
+        headlines = self.headlines()
+        parts = [f"Headlines from {self.__source_id}\n\n"]
+        append = parts.append
         for article in headlines["articles"]:
-            report_text = report_text + \
-                          "Title: " + str(article["title"]) + "\n" + \
-                          "Description: " + str(article["description"]) + "\n\n"
-        return report_text
+            append(f"Title: {article['title']}\n"
+                   f"Description: {article['description']}\n\n")
+        return "".join(parts)
+
+    def fetch(self):
+        return top_headlines(self.__source_id)
 
     def __init__(self,source_id):
         self.__source_id = source_id
+        self._text = None
+        self._future = None
 
 # Extensions to the report will involve a search term, this defines what it
 # means to be an extension.  This class corresponds to the Decorator class in
@@ -58,26 +124,58 @@ class ReportExtension(Report):
         self.report = report
         self.source_id = source_id
         self.search_term = search_term
+        self._text = None
+        self._future = None
+
+    # Prefetches the data for every report in the chain, walking down the
+    # chain in a loop rather than recursing once per decorator
+    def prefetch(self, executor):
+        report = self
+        while isinstance(report, ReportExtension):
+            Report.prefetch(report, executor)
+            report = report.report
+        report.prefetch(executor)
+
+    # Appends the text this extension adds to the report onto parts
+    @abstractmethod
+    def add_section(self, parts):
+        pass
+
+    # Builds the text of the whole decorator chain in one linear pass: walk
+    # down to the innermost report, then have each extension append its
+    # section in order, joining everything once at the end.  This avoids
+    # recursing through report_text() and joining again at every level.
+    @memoize_text
+    def report_text(self):
+        extensions = []
+        report = self
+        while isinstance(report, ReportExtension):
+            extensions.append(report)
+            report = report.report
+        parts = [report.report_text()]
+        for extension in reversed(extensions):
+            extension.add_section(parts)
+        return "".join(parts)
 
 # This class decorates the report with data retrieved from the News API
 # for any article with a title containing the search term.  It corresponds to
 # the ConcreteDecorator class in the Decorator pattern.
 class ReportTitleSearch(ReportExtension):
 
-    # Calls News API to get search results, puts result data into a string
-    def report_text(self):
-        App().log("Building report title search, term= " + self.search_term)
-        report_text = self.report.report_text()
-        headlines = App().newsapi.get_everything(sources=self.source_id,
-                                                 qintitle=self.search_term)
-        report_text = report_text + "****************************************"
-        report_text = report_text + "\n\nSearch results for '" + \
-                      self.search_term + "' in the title only: \n\n"
+    # Adds the News API search result data to the report
+    def add_section(self, parts):
+        APP.log(f"Building report title search, term= {self.search_term}")
+        headlines = self.headlines()
+        append = parts.append
+        append("****************************************")
+        append(f"\n\nSearch results for '{self.search_term}' "
+               "in the title only: \n\n")
         for article in headlines["articles"]:
-            report_text = report_text + \
-                          "Title: " + str(article["title"]) + "\n" + \
-                          "Author: " + str(article["author"]) + "\n\n"
-        return report_text
+            append(f"Title: {article['title']}\n"
+                   f"Author: {article['author']}\n\n")
+
+    def fetch(self):
+        return search_everything(self.source_id, qintitle=self.search_term)
 
 
 # This class decorates the report with data retrieved from the News API
@@ -85,17 +183,17 @@ class ReportTitleSearch(ReportExtension):
 # corresponds to the ConcreteDecorator class in the Decorator pattern.
 class ReportAllSearch(ReportExtension):
 
-    # Calls News API to get search results, puts result data into a string
-    def report_text(self):
-        App().log("Building report all search, term=" + self.search_term)
-        report_text = self.report.report_text()
-        headlines = App().newsapi.get_everything(sources=self.source_id,
-                                                 q=self.search_term)
-        report_text = report_text + "****************************************"
-        report_text = report_text + "\n\nSearch results for '" + \
-                      self.search_term + "' in the title or content: \n\n"
+    # Adds the News API search result data to the report
+    def add_section(self, parts):
+        APP.log(f"Building report all search, term={self.search_term}")
+        headlines = self.headlines()
+        append = parts.append
+        append("****************************************")
+        append(f"\n\nSearch results for '{self.search_term}' "
+               "in the title or content: \n\n")
         for article in headlines["articles"]:
-            report_text = report_text + \
-                          "Title: " + str(article["title"]) + "\n" + \
-                          "Content: " + str(article["content"]) + "\n\n"
-        return report_text
+            append(f"Title: {article['title']}\n"
+                   f"Content: {article['content']}\n\n")
+
+    def fetch(self):
+        return search_everything(self.source_id, q=self.search_term)
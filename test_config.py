@@ -0,0 +1,50 @@
+################################################################################
+# Tests for config file parsing
+#
+# Purpose: Checks that config.read_config produces the same values as the
+# configparser module would, for the application's config file and for
+# config files with empty values.  Run with: python -m unittest
+#
+################################################################################
+
+import configparser
+import os
+import tempfile
+import unittest
+from config import read_config
+
+# Parse a config file with configparser into the same dict layout returned by
+# read_config
+def configparser_config(filename):
+    config = configparser.ConfigParser()
+    config.read(filename)
+    return {name: dict(config[name]) for name in config.sections()}
+
+class ReadConfigTest(unittest.TestCase):
+
+    # Write text to a temporary config file and return its filename
+    def config_file(self, text):
+        config_file = tempfile.NamedTemporaryFile("w", suffix=".cfg",
+                                                  delete=False)
+        config_file.write(text)
+        config_file.close()
+        self.addCleanup(os.remove, config_file.name)
+        return config_file.name
+
+    def test_matches_configparser_on_app_config(self):
+        filename = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "config.cfg")
+        self.assertEqual(read_config(filename), configparser_config(filename))
+
+    def test_empty_value(self):
+        filename = self.config_file("[A]\nx=\ny=2\n")
+        self.assertEqual(read_config(filename), {"A": {"x": "", "y": "2"}})
+        self.assertEqual(read_config(filename), configparser_config(filename))
+
+    def test_empty_password(self):
+        filename = self.config_file("[Database]\nhost=localhost\nport=6379\n"
+                                    "password=\n[NewsAPI]\napikey=key\n")
+        self.assertEqual(read_config(filename), configparser_config(filename))
+
+if __name__ == "__main__":
+    unittest.main()